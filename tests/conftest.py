@@ -0,0 +1,94 @@
+"""
+Pytest configuration for the test suites
+
+The suites run against an in-memory SQLite database unless DATABASE_URI
+points somewhere else. When the tests are run in parallel with
+pytest-xdist, every worker gets a database of its own so that suites
+running side by side never clean up each other's rows.
+"""
+import os
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+DATABASE_URI = os.getenv("DATABASE_URI", "sqlite:///:memory:")
+
+
+def worker_database_uri(base_uri, worker_id):
+    """Returns the database URI reserved for a pytest-xdist worker"""
+    url = make_url(base_uri)
+    if url.database in (None, "", ":memory:"):
+        return base_uri  # in-memory databases are private to each worker
+    if url.get_backend_name() == "sqlite":
+        root, ext = os.path.splitext(url.database)
+        return str(url.set(database=f"{root}_{worker_id}{ext}"))
+    return str(url.set(database=f"{url.database}_{worker_id}"))
+
+
+def admin_engine(uri):
+    """Returns an engine on the Postgres maintenance database"""
+    return create_engine(
+        make_url(uri).set(database="postgres"), isolation_level="AUTOCOMMIT"
+    )
+
+
+def create_postgres_database(uri):
+    """Creates the Postgres database named in the URI if it does not exist"""
+    name = make_url(uri).database
+    engine = admin_engine(uri)
+    with engine.connect() as connection:
+        found = connection.execute(
+            text("SELECT 1 FROM pg_database WHERE datname = :name"),
+            {"name": name},
+        ).scalar()
+        if not found:
+            connection.execute(text(f'CREATE DATABASE "{name}"'))
+    engine.dispose()
+
+
+def drop_postgres_database(uri):
+    """Drops the Postgres database named in the URI"""
+    name = make_url(uri).database
+    engine = admin_engine(uri)
+    with engine.connect() as connection:
+        # the service engine may still hold pooled connections to it
+        connection.execute(text(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'))
+    engine.dispose()
+
+
+def remove_sqlite_database(uri):
+    """Deletes the SQLite file named in the URI"""
+    # pylint: disable=import-outside-toplevel
+    from service import app
+
+    # Flask-SQLAlchemy resolves relative paths against the app root
+    path = os.path.join(app.root_path, make_url(uri).database)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def is_postgres(uri):
+    """Returns True if the URI points at a Postgres server"""
+    return make_url(uri).get_backend_name() == "postgresql"
+
+
+def pytest_configure(config):
+    """Points the suites, and each pytest-xdist worker, at their database"""
+    uri = DATABASE_URI
+    worker_input = getattr(config, "workerinput", None)
+    if worker_input is not None:
+        uri = worker_database_uri(uri, worker_input["workerid"])
+        if is_postgres(uri):
+            create_postgres_database(uri)
+    # the service and the test suites read this when they are imported
+    os.environ["DATABASE_URI"] = uri
+
+
+def pytest_unconfigure(config):
+    """Removes the database that was created for a pytest-xdist worker"""
+    uri = os.environ["DATABASE_URI"]
+    if getattr(config, "workerinput", None) is None or uri == DATABASE_URI:
+        return  # nothing was created for this process
+    if is_postgres(uri):
+        drop_postgres_database(uri)
+    else:
+        remove_sqlite_database(uri)